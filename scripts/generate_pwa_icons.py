@@ -6,10 +6,18 @@ Description: Генерация иконок PWA из одного изобра
 Usage: python scripts/generate_pwa_icons.py <input_image>
 """
 
+import functools
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFilter
+from PIL import Image, ImageChops, ImageDraw, ImageFilter
+
+# Опциональная зависимость: pyoxipng (многопоточная Rust-оптимизация PNG)
+try:
+    import oxipng
+except ImportError:
+    oxipng = None
 
 # Размеры иконок для PWA
 ICON_SIZES = [
@@ -21,42 +29,123 @@ MASKABLE_SIZES = [
     192, 512
 ]
 
-def create_rounded_icon(img, size, corner_radius_percent=0.2):
+# До этого размера включительно (favicon 16/32/48) билинейный фильтр
+# визуально неотличим от Lanczos, но заметно дешевле
+BILINEAR_MAX_SIZE = 48
+
+# Базовый размер маски: растеризуем закругленный прямоугольник один раз
+# на максимальном размере иконки, остальные размеры получаем ресайзом
+_MASK_BASE_SIZE = 512
+
+
+@functools.lru_cache(maxsize=None)
+def _base_mask(corner_radius_percent):
     """
-    Создать иконку с закругленными углами
+    Базовая маска с закругленными углами
+
+    Растеризуется один раз на каждый процент закругления.
 
     Args:
-        img: PIL Image объект
-        size: размер итоговой иконки
         corner_radius_percent: процент закругления углов (0.0 - 1.0)
-    """
-    # Создаем квадратное изображение нужного размера
-    icon = img.resize((size, size), Image.Resampling.LANCZOS)
 
-    # Создаем маску с закругленными углами
-    mask = Image.new('L', (size, size), 0)
+    Returns:
+        PIL Image: маска в режиме 'L' размера _MASK_BASE_SIZE
+    """
+    mask = Image.new('L', (_MASK_BASE_SIZE, _MASK_BASE_SIZE), 0)
     draw = ImageDraw.Draw(mask)
 
-    corner_radius = int(size * corner_radius_percent)
+    corner_radius = int(_MASK_BASE_SIZE * corner_radius_percent)
     draw.rounded_rectangle(
-        [(0, 0), (size, size)],
+        [(0, 0), (_MASK_BASE_SIZE, _MASK_BASE_SIZE)],
         radius=corner_radius,
         fill=255
     )
 
-    # Применяем маску
-    output = Image.new('RGBA', (size, size), (255, 255, 255, 0))
-    output.paste(icon, (0, 0))
-    output.putalpha(mask)
+    return mask
+
+
+@functools.lru_cache(maxsize=None)
+def _rounded_mask(size, corner_radius_percent):
+    """
+    Маска с закругленными углами для заданного размера
+
+    Вместо пошаговой CPython-растеризации на каждый размер базовая маска
+    уменьшается C-кодом Pillow; попутно края получают сглаживание.
+
+    Args:
+        size: размер маски
+        corner_radius_percent: процент закругления углов (0.0 - 1.0)
+
+    Returns:
+        PIL Image: маска в режиме 'L'
+    """
+    base = _base_mask(corner_radius_percent)
+
+    if size == _MASK_BASE_SIZE:
+        return base
+
+    return base.resize((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
+def make_scaler(img):
+    """
+    Создать функцию масштабирования с кешем по размеру
+
+    Исходное изображение одно для всех иконок, поэтому результат ресайза
+    для каждого размера вычисляется один раз и переиспользуется.
+
+    Args:
+        img: PIL Image объект (исходное изображение)
+
+    Returns:
+        callable: scale(size) -> PIL Image размера size x size
+    """
+    cache = {}
+
+    def scale(size):
+        if size not in cache:
+            resample = (
+                Image.Resampling.BILINEAR
+                if size <= BILINEAR_MAX_SIZE
+                else Image.Resampling.LANCZOS
+            )
+            # reducing_gap включает быстрый box-reduce перед финальным
+            # фильтром (~2x на больших уменьшениях)
+            cache[size] = img.resize((size, size), resample, reducing_gap=2.0)
+        return cache[size]
+
+    return scale
+
+
+def create_rounded_icon(scale, size, corner_radius_percent=0.2):
+    """
+    Создать иконку с закругленными углами
+
+    Args:
+        scale: функция масштабирования из make_scaler
+        size: размер итоговой иконки
+        corner_radius_percent: процент закругления углов (0.0 - 1.0)
+    """
+    # Создаем квадратное изображение нужного размера
+    icon = scale(size)
+
+    # Маска с закругленными углами (кешируется по размеру)
+    mask = _rounded_mask(size, corner_radius_percent)
+
+    # Применяем маску одним проходом: умножаем альфа-канал на маску
+    # вместо промежуточного холста + paste + putalpha.
+    # Заодно сохраняется собственная прозрачность логотипа.
+    output = icon.copy()
+    output.putalpha(ImageChops.multiply(icon.getchannel('A'), mask))
 
     return output
 
-def create_maskable_icon(img, size, safe_zone_percent=0.8):
+def create_maskable_icon(scale, size, safe_zone_percent=0.8):
     """
     Создать maskable иконку с безопасной зоной
 
     Args:
-        img: PIL Image объект
+        scale: функция масштабирования из make_scaler
         size: размер итоговой иконки
         safe_zone_percent: процент безопасной зоны (0.0 - 1.0)
     """
@@ -68,23 +157,88 @@ def create_maskable_icon(img, size, safe_zone_percent=0.8):
     padding = (size - safe_size) // 2
 
     # Ресайзим основное изображение
-    icon = img.resize((safe_size, safe_size), Image.Resampling.LANCZOS)
+    icon = scale(safe_size)
 
     # Накладываем на фон
     background.paste(icon, (padding, padding), icon if icon.mode == 'RGBA' else None)
 
     return background
 
-def create_favicon(img):
-    """Создать favicon.ico с несколькими размерами"""
-    sizes = [16, 32, 48]
-    icons = []
+def _save_png(icon, output_file):
+    """
+    Сохранить PNG с оптимизацией размера
+
+    При наличии pyoxipng используется быстрое кодирование (compress_level=1),
+    а оптимизация размера выполняется отдельным общим проходом после
+    генерации всех иконок (см. _optimize_pngs). Без pyoxipng - обычный путь.
+
+    Args:
+        icon: PIL Image объект
+        output_file: путь к файлу результата
+    """
+    if oxipng is not None:
+        icon.save(output_file, 'PNG', compress_level=1)
+    else:
+        icon.save(output_file, 'PNG', optimize=True)
+
+
+def _optimize_pngs(paths):
+    """
+    Оптимизировать сохраненные PNG одним координированным проходом
+
+    oxipng - нативный код, отпускающий GIL, поэтому файлы обрабатываются
+    параллельно в пуле потоков без сериализации с генерацией иконок.
+
+    Args:
+        paths: список путей к PNG файлам
+    """
+    def optimize(path):
+        oxipng.optimize(str(path), level=2, strip=oxipng.StripChunks.safe())
+
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(optimize, paths))
+
+
+def _render_icon(img, kind, size, output_file):
+    """
+    Воркер генерации одной иконки
+
+    Выполняется в отдельном процессе: каждая иконка - независимая задача
+    (ресайз + маска + PNG-кодирование), поэтому генерация масштабируется
+    по числу ядер.
+
+    Args:
+        img: PIL Image объект (исходное изображение)
+        kind: тип иконки ('rounded', 'maskable', 'favicon')
+        size: размер итоговой иконки (None для favicon)
+        output_file: путь к файлу результата
 
-    for size in sizes:
-        icon = img.resize((size, size), Image.Resampling.LANCZOS)
-        icons.append(icon)
+    Returns:
+        tuple: (успех, имя файла, текст ошибки или None, путь к PNG или None)
+    """
+    try:
+        scale = make_scaler(img)
+
+        if kind == 'rounded':
+            icon = create_rounded_icon(scale, size)
+            _save_png(icon, output_file)
+        elif kind == 'maskable':
+            icon = create_maskable_icon(scale, size)
+            _save_png(icon, output_file)
+        elif kind == 'favicon':
+            # Pillow сам раскладывает ICO по размерам из одного изображения,
+            # поэтому ресайзим источник один раз до максимального размера
+            scale(48).save(
+                output_file,
+                format='ICO',
+                sizes=[(16, 16), (32, 32), (48, 48)]
+            )
+            return True, output_file.name, None, None
+
+        return True, output_file.name, None, output_file
+    except Exception as e:
+        return False, output_file.name, str(e), None
 
-    return icons
 
 def generate_icons(input_path, output_dir):
     """
@@ -106,6 +260,10 @@ def generate_icons(input_path, output_dir):
         if img.mode != 'RGBA':
             img = img.convert('RGBA')
 
+        # Декодируем пиксели один раз: дальше все задания работают
+        # с готовым RGBA-буфером, а не перечитывают файл
+        img.load()
+
         print(f"✓ Загружено изображение: {input_path}")
         print(f"  Размер: {img.size}")
         print(f"  Режим: {img.mode}")
@@ -114,51 +272,42 @@ def generate_icons(input_path, output_dir):
         print(f"✗ Ошибка при загрузке изображения: {e}")
         return False
 
-    # Генерируем обычные иконки
-    print("\nГенерация обычных иконок:")
-    for size in ICON_SIZES:
-        try:
-            icon = create_rounded_icon(img, size)
-            output_file = output_path / f"icon-{size}x{size}.png"
-            icon.save(output_file, 'PNG', optimize=True)
-            print(f"  ✓ {output_file.name}")
-        except Exception as e:
-            print(f"  ✗ Ошибка при создании {size}x{size}: {e}")
-
-    # Генерируем maskable иконки
-    print("\nГенерация maskable иконок:")
-    for size in MASKABLE_SIZES:
-        try:
-            icon = create_maskable_icon(img, size)
-            output_file = output_path / f"icon-maskable-{size}x{size}.png"
-            icon.save(output_file, 'PNG', optimize=True)
-            print(f"  ✓ {output_file.name}")
-        except Exception as e:
-            print(f"  ✗ Ошибка при создании maskable {size}x{size}: {e}")
-
-    # Генерируем Apple Touch Icon
-    print("\nГенерация Apple Touch Icon:")
-    try:
-        apple_icon = create_rounded_icon(img, 180)
-        output_file = output_path / "apple-touch-icon.png"
-        apple_icon.save(output_file, 'PNG', optimize=True)
-        print(f"  ✓ {output_file.name}")
-    except Exception as e:
-        print(f"  ✗ Ошибка при создании Apple Touch Icon: {e}")
-
-    # Генерируем favicon.ico
-    print("\nГенерация favicon.ico:")
-    try:
-        favicon_icons = create_favicon(img)
-        output_file = output_path.parent / "favicon.ico"
-        favicon_icons[0].save(
-            output_file,
-            format='ICO',
-            sizes=[(16, 16), (32, 32), (48, 48)]
-        )
-        print(f"  ✓ {output_file.name}")
-    except Exception as e:
-        print(f"  ✗ Ошибка при создании favicon.ico: {e}")
+    # Формируем список заданий: каждая иконка - независимая работа
+    jobs = [
+        ('rounded', size, output_path / f"icon-{size}x{size}.png")
+        for size in ICON_SIZES
+    ]
+    jobs += [
+        ('maskable', size, output_path / f"icon-maskable-{size}x{size}.png")
+        for size in MASKABLE_SIZES
+    ]
+    jobs.append(('rounded', 180, output_path / "apple-touch-icon.png"))
+    jobs.append(('favicon', None, output_path.parent / "favicon.ico"))
+
+    # Генерируем иконки параллельно (по числу ядер CPU)
+    print("\nГенерация иконок:")
+    png_paths = []
+
+    with ProcessPoolExecutor() as executor:
+        futures = [
+            executor.submit(_render_icon, img, kind, size, output_file)
+            for kind, size, output_file in jobs
+        ]
+
+        for future in futures:
+            success, name, error, png_path = future.result()
+            if success:
+                print(f"  ✓ {name}")
+                if png_path is not None:
+                    png_paths.append(png_path)
+            else:
+                print(f"  ✗ Ошибка при создании {name}: {error}")
+
+    # Пост-оптимизация всех PNG одним многопоточным проходом
+    if oxipng is not None and png_paths:
+        print("\nОптимизация PNG (oxipng):")
+        _optimize_pngs(png_paths)
+        print(f"  ✓ Оптимизировано файлов: {len(png_paths)}")
 
     print(f"\n✓ Генерация завершена! Файлы сохранены в: {output_dir}")
     return True
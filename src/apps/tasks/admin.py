@@ -4,10 +4,48 @@ Path: src/apps/tasks/admin_updated.py
 Description: Обновленная административная панель с подсчетом времени выполнения и отображением исполнителей
 """
 from django.contrib import admin
-from django.utils.html import format_html
+from django.db.models import DurationField, ExpressionWrapper, F, Prefetch
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
 from .models import Task, Subtask, SubtaskAssignment, TaskAction
 
 
+# Префетч назначений вместе с исполнителями: один запрос на весь список
+# вместо запроса на каждую строку
+ASSIGNMENTS_WITH_USERS = Prefetch(
+    'assignments',
+    queryset=SubtaskAssignment.objects.select_related('user')
+)
+
+# Предкомпилированные HTML-шаблоны ячеек changelist:
+# str.format + mark_safe вместо разбора format_html на каждой строке
+INLINE_DONE_TMPL = (
+    '<span style="color: white; font-weight: bold;">{assignees}</span> | '
+    '<span style="color: green; font-weight: bold;">{duration}</span> '
+    '({start}-{end})'
+)
+INLINE_IN_PROGRESS_TMPL = (
+    '<span style="color: white; font-weight: bold;">{assignees}</span> | '
+    '<span style="color: orange;">В процессе</span>'
+)
+INLINE_IDLE_TMPL = (
+    '<span style="color: white; font-weight: bold;">{assignees}</span> | '
+    '<span style="color: gray;">Не начата</span>'
+)
+DURATION_TMPL = '<strong style="color: {color};">{duration}</strong> ({minutes}мин)'
+IN_PROGRESS_HTML = mark_safe('<span style="color: orange;">В процессе</span>')
+TIME_RANGE_TMPL = '{range}<br><small style="color: gray;">{date}</small>'
+TIME_STARTED_TMPL = (
+    'Начато: {start}<br><small style="color: orange;">В процессе</small>'
+)
+ACTION_COMPLETED_TMPL = (
+    '<strong>{user}</strong><br>'
+    '<span style="color: green;">Подзадача: {subtask}</span><br>'
+    '<span style="color: blue;">Длительность: {duration}</span><br>'
+    '<span style="color: gray;">Время: {time_range} ({date})</span>'
+)
+
+
 class SubtaskInline(admin.TabularInline):
     """Встроенная форма для подзадач"""
     model = Subtask
@@ -15,37 +53,30 @@ class SubtaskInline(admin.TabularInline):
     fields = ['name', 'status', 'order', 'started_at', 'completed_at', 'duration_display']
     readonly_fields = ['duration_display']
 
+    def get_queryset(self, request):
+        """Подгрузка назначений с исполнителями одним запросом"""
+        return super().get_queryset(request).prefetch_related(ASSIGNMENTS_WITH_USERS)
+
     def duration_display(self, obj):
         """Отображение времени выполнения с исполнителями"""
-        # Получаем всех исполнителей
-        assignees = obj.assignments.select_related('user').all()
+        # Получаем всех исполнителей (из префетч-кеша, без запросов)
+        assignees = obj.assignments.all()
         assignees_names = ', '.join([a.user.full_name for a in assignees]) if assignees else 'Не назначено'
 
         if obj.started_at and obj.completed_at:
-            duration = obj.get_duration_formatted()
-            minutes = obj.get_duration_minutes()
-            start_time = obj.started_at.strftime('%H:%M')
-            end_time = obj.completed_at.strftime('%H:%M')
-
-            return format_html(
-                '<span style="color: white; font-weight: bold;">{}</span> | '
-                '<span style="color: green; font-weight: bold;">{}</span> ({}-{})',
-                assignees_names,
-                duration,
-                start_time,
-                end_time
-            )
+            return mark_safe(INLINE_DONE_TMPL.format(
+                assignees=escape(assignees_names),
+                duration=obj.get_duration_formatted(),
+                start=obj.started_at.strftime('%H:%M'),
+                end=obj.completed_at.strftime('%H:%M')
+            ))
         elif obj.started_at:
-            return format_html(
-                '<span style="color: white; font-weight: bold;">{}</span> | '
-                '<span style="color: orange;">В процессе</span>',
-                assignees_names
-            )
-        return format_html(
-            '<span style="color: white; font-weight: bold;">{}</span> | '
-            '<span style="color: gray;">Не начата</span>',
-            assignees_names
-        )
+            return mark_safe(INLINE_IN_PROGRESS_TMPL.format(
+                assignees=escape(assignees_names)
+            ))
+        return mark_safe(INLINE_IDLE_TMPL.format(
+            assignees=escape(assignees_names)
+        ))
 
     duration_display.short_description = 'Исполнители и время выполнения'
 
@@ -93,9 +124,20 @@ class SubtaskAdmin(admin.ModelAdmin):
     inlines = [SubtaskAssignmentInline]
     readonly_fields = ['duration_display', 'time_range_display']
 
+    def get_queryset(self, request):
+        """Подгрузка назначений одним запросом и подсчет длительности в SQL"""
+        return super().get_queryset(request).prefetch_related(
+            ASSIGNMENTS_WITH_USERS
+        ).annotate(
+            _duration=ExpressionWrapper(
+                F('completed_at') - F('started_at'),
+                output_field=DurationField()
+            )
+        )
+
     def assignees_display(self, obj):
         """Отображение исполнителей"""
-        assignees = obj.assignments.select_related('user').all()
+        assignees = obj.assignments.all()
         if assignees:
             names = [a.user.first_name_only for a in assignees]
             return ', '.join(names)
@@ -106,18 +148,23 @@ class SubtaskAdmin(admin.ModelAdmin):
     def duration_display(self, obj):
         """Отображение времени выполнения"""
         if obj.started_at and obj.completed_at:
-            duration = obj.get_duration_formatted()
-            minutes = obj.get_duration_minutes()
+            # Длительность приходит из SQL-аннотации, Python только форматирует
+            delta = getattr(obj, '_duration', None)
+            if delta is None:
+                delta = obj.completed_at - obj.started_at
+
+            minutes = int(delta.total_seconds() // 60)
+            hours, mins = divmod(minutes, 60)
+            duration = f"{hours}ч {mins}м" if hours > 0 else f"{mins}м"
 
             color = 'green' if obj.status == 'completed' else 'orange'
-            return format_html(
-                '<strong style="color: {};">{}</strong> ({}мин)',
-                color,
-                duration,
-                minutes
-            )
+            return mark_safe(DURATION_TMPL.format(
+                color=color,
+                duration=duration,
+                minutes=minutes
+            ))
         elif obj.started_at:
-            return format_html('<span style="color: orange;">В процессе</span>')
+            return IN_PROGRESS_HTML
         return '-'
 
     duration_display.short_description = 'Длительность'
@@ -129,17 +176,14 @@ class SubtaskAdmin(admin.ModelAdmin):
             end_time = obj.completed_at.strftime('%H:%M')
             date_str = obj.started_at.strftime('%d.%m.%Y')
 
-            return format_html(
-                '{}<br><small style="color: gray;">{}</small>',
-                f"{start_time} - {end_time}",
-                date_str
-            )
+            return mark_safe(TIME_RANGE_TMPL.format(
+                range=f"{start_time} - {end_time}",
+                date=date_str
+            ))
         elif obj.started_at:
-            start_time = obj.started_at.strftime('%H:%M, %d.%m.%Y')
-            return format_html(
-                'Начато: {}<br><small style="color: orange;">В процессе</small>',
-                start_time
-            )
+            return mark_safe(TIME_STARTED_TMPL.format(
+                start=obj.started_at.strftime('%H:%M, %d.%m.%Y')
+            ))
         return '-'
 
     time_range_display.short_description = 'Время'
@@ -152,6 +196,8 @@ class SubtaskAssignmentAdmin(admin.ModelAdmin):
     list_display = ['subtask', 'user', 'assigned_at']
     list_filter = ['assigned_at', 'user']
     search_fields = ['subtask__name', 'user__full_name']
+    # Подзадача выводится вместе с названием задачи - подгружаем JOIN-ом
+    list_select_related = ['subtask__task', 'user']
 
 
 @admin.register(TaskAction)
@@ -167,6 +213,8 @@ class TaskActionAdmin(admin.ModelAdmin):
     ]
     list_filter = ['action_type', 'timestamp', 'user']
     search_fields = ['task__title', 'user__full_name']
+    # formatted_info обращается к task и user на каждой строке
+    list_select_related = ['task', 'user']
     readonly_fields = [
         'task',
         'user',
@@ -199,17 +247,13 @@ class TaskActionAdmin(admin.ModelAdmin):
         formatted = obj.get_formatted_description()
 
         if obj.action_type == 'completed' and 'duration' in formatted:
-            return format_html(
-                '<strong>{}</strong><br>'
-                '<span style="color: green;">Подзадача: {}</span><br>'
-                '<span style="color: blue;">Длительность: {}</span><br>'
-                '<span style="color: gray;">Время: {} ({})</span>',
-                formatted.get('user', ''),
-                formatted.get('subtask', ''),
-                formatted.get('duration', ''),
-                formatted.get('time_range', ''),
-                formatted.get('date', '')
-            )
+            return mark_safe(ACTION_COMPLETED_TMPL.format(
+                user=escape(formatted.get('user', '')),
+                subtask=escape(formatted.get('subtask', '')),
+                duration=escape(formatted.get('duration', '')),
+                time_range=formatted.get('time_range', ''),
+                date=formatted.get('date', '')
+            ))
 
         return formatted.get('full_text', str(obj))
 
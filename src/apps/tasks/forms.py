@@ -4,6 +4,7 @@ Path: src/apps/tasks/forms.py
 Description: Формы для создания и редактирования задач с автозаполнением из шаблона
 """
 from django import forms
+from django.db.models import Exists, OuterRef
 from .models import Task, Subtask, SubtaskAssignment
 from apps.temp.models import TaskTemplate
 from apps.users.models import User
@@ -137,18 +138,25 @@ class CompleteSubtaskForm(forms.Form):
         """Валидация прав на завершение подзадачи"""
         subtask_id = self.cleaned_data['subtask_id']
 
-        try:
-            subtask = Subtask.objects.get(id=subtask_id)
+        # Одним запросом получаем подзадачу и признак назначения
+        subtask = Subtask.objects.annotate(
+            is_assigned=Exists(
+                SubtaskAssignment.objects.filter(
+                    subtask_id=OuterRef('id'),
+                    user=self.user
+                )
+            )
+        ).filter(id=subtask_id).first()
 
-            # Проверяем, что пользователь назначен на эту подзадачу
-            if not subtask.assignments.filter(user=self.user).exists():
-                raise forms.ValidationError('Вы не назначены на эту подзадачу')
+        if subtask is None:
+            raise forms.ValidationError('Подзадача не найдена')
 
-            # Проверяем, что подзадача еще не завершена
-            if subtask.status == Subtask.Status.COMPLETED:
-                raise forms.ValidationError('Подзадача уже завершена')
+        # Проверяем, что пользователь назначен на эту подзадачу
+        if not subtask.is_assigned:
+            raise forms.ValidationError('Вы не назначены на эту подзадачу')
 
-            return subtask_id
+        # Проверяем, что подзадача еще не завершена
+        if subtask.status == Subtask.Status.COMPLETED:
+            raise forms.ValidationError('Подзадача уже завершена')
 
-        except Subtask.DoesNotExist:
-            raise forms.ValidationError('Подзадача не найдена')
+        return subtask_id
@@ -3,16 +3,18 @@ Filename: management_views.py
 Path: src/apps/tasks/management_views.py
 Description: Представления для кастомной страницы управления менеджерами
 """
+from functools import partial
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView, CreateView, UpdateView, DeleteView
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.db import transaction
+from django.db.models import Count, Q
 from .models import Task, Subtask, TaskAction
 from .forms import TaskCreateForm, TaskUpdateForm
 from .utils.permissions import ManagerOrAdminMixin
-from apps.temp.models import TaskTemplate, SubtaskTemplate
+from apps.temp.models import TaskTemplate, SubtaskTemplate, SubtaskTemplateItem
 from django import forms
 
 
@@ -56,19 +58,27 @@ class ManagementDashboardView(LoginRequiredMixin, ManagerOrAdminMixin, TemplateV
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Получаем список всех шаблонов
+        # Получаем список всех шаблонов вместе с объектами подзадач:
+        # шаблон выводит subtask.name, который живет в subtask_item
         if self.request.user.can_manage_templates:
-            context['templates'] = TaskTemplate.objects.all().prefetch_related('subtask_templates')
+            context['templates'] = TaskTemplate.objects.all().prefetch_related(
+                'subtask_templates__subtask_item'
+            )
         else:
             context['templates'] = TaskTemplate.objects.filter(
                 is_active=True,
                 available_for_managers=True
-            ).prefetch_related('subtask_templates')
-
-        # Статистика по задачам
-        context['total_tasks'] = Task.objects.count()
-        context['active_tasks'] = Task.objects.filter(status='in_progress').count()
-        context['completed_tasks'] = Task.objects.filter(status='completed').count()
+            ).prefetch_related('subtask_templates__subtask_item')
+
+        # Статистика по задачам одним запросом вместо трех COUNT
+        stats = Task.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='in_progress')),
+            completed=Count('id', filter=Q(status='completed'))
+        )
+        context['total_tasks'] = stats['total']
+        context['active_tasks'] = stats['active']
+        context['completed_tasks'] = stats['completed']
 
         return context
 
@@ -127,24 +137,75 @@ class ManagementTemplateUpdateView(LoginRequiredMixin, ManagerOrAdminMixin, Upda
     def form_valid(self, form):
         response = super().form_valid(form)
 
-        # Удаляем старые подзадачи
-        self.object.subtask_templates.all().delete()
-
-        # Создаем новые подзадачи
+        # Синхронизируем подзадачи шаблона с данными формы
         subtask_names = self.request.POST.getlist('subtask_name[]')
         subtask_orders = self.request.POST.getlist('subtask_order[]')
-
-        for i, name in enumerate(subtask_names):
-            if name.strip():
-                SubtaskTemplate.objects.create(
-                    task_template=self.object,
-                    name=name.strip(),
-                    order=int(subtask_orders[i]) if i < len(subtask_orders) else i
-                )
+        self._sync_subtask_templates(subtask_names, subtask_orders)
 
         messages.success(self.request, f'Шаблон "{self.object.name}" успешно обновлен')
         return response
 
+    def _sync_subtask_templates(self, names, orders):
+        """
+        Синхронизация подзадач шаблона с отправленным списком
+
+        Вместо удаления и пересоздания всех связей вычисляется разница:
+        одно удаление лишних, один bulk_update порядка, один bulk_create
+        новых - три запроса независимо от длины списка.
+        """
+        # Желаемое состояние: имя подзадачи -> порядок
+        desired = {}
+        for i, name in enumerate(names):
+            name = name.strip()
+            if name:
+                desired[name] = int(orders[i]) if i < len(orders) else i
+
+        # Текущее состояние одним запросом
+        existing = {
+            st.subtask_item.name: st
+            for st in self.object.subtask_templates.select_related('subtask_item')
+        }
+
+        # Удаляем связи, которых больше нет в форме
+        removed_ids = [
+            st.id for name, st in existing.items() if name not in desired
+        ]
+        if removed_ids:
+            self.object.subtask_templates.filter(id__in=removed_ids).delete()
+
+        # Обновляем изменившийся порядок
+        changed = []
+        for name, st in existing.items():
+            if name in desired and st.order != desired[name]:
+                st.order = desired[name]
+                changed.append(st)
+        if changed:
+            SubtaskTemplate.objects.bulk_update(changed, ['order'])
+
+        # Создаем новые связи (и объекты подзадач, если таких еще нет)
+        new_names = [name for name in desired if name not in existing]
+        if new_names:
+            items = {
+                item.name: item
+                for item in SubtaskTemplateItem.objects.filter(name__in=new_names)
+            }
+
+            new_links = []
+            for name in new_names:
+                item = items.get(name)
+                if item is None:
+                    item = SubtaskTemplateItem.objects.create(
+                        name=name,
+                        created_by=self.request.user
+                    )
+                new_links.append(SubtaskTemplate(
+                    task_template=self.object,
+                    subtask_item=item,
+                    order=desired[name]
+                ))
+
+            SubtaskTemplate.objects.bulk_create(new_links)
+
 
 class ManagementTemplateDeleteView(LoginRequiredMixin, ManagerOrAdminMixin, DeleteView):
     """
@@ -192,41 +253,55 @@ class ManagementTaskCreateView(LoginRequiredMixin, ManagerOrAdminMixin, CreateVi
             if form.cleaned_data.get('template'):
                 template = form.cleaned_data['template']
 
-                for subtask_template in template.get_subtask_templates():
-                    Subtask.objects.create(
+                # Загружаем подзадачи шаблона один раз: и для создания,
+                # и для подсчета в логе
+                subtask_templates = list(template.get_subtask_templates())
+
+                # Один INSERT на все подзадачи вместо запроса на каждую
+                Subtask.objects.bulk_create([
+                    Subtask(
                         task=self.object,
                         name=subtask_template.name,
                         order=subtask_template.order
                     )
+                    for subtask_template in subtask_templates
+                ])
 
-                # Логируем создание задачи
-                TaskAction.objects.create(
+                # Логируем создание задачи после фиксации транзакции
+                transaction.on_commit(partial(
+                    TaskAction.objects.create,
                     task=self.object,
                     user=self.request.user,
                     action_type=TaskAction.ActionType.CREATED,
                     details={
                         'template_name': template.name,
-                        'subtasks_count': template.subtask_templates.count()
+                        'subtasks_count': len(subtask_templates)
                     }
-                )
+                ))
             else:
                 # Создание задачи вручную - обработка подзадач из формы
                 subtask_names = self.request.POST.getlist('subtask_name[]')
 
-                for i, name in enumerate(subtask_names):
-                    if name.strip():
-                        Subtask.objects.create(
-                            task=self.object,
-                            name=name.strip(),
-                            order=i
-                        )
+                Subtask.objects.bulk_create([
+                    Subtask(
+                        task=self.object,
+                        name=name.strip(),
+                        order=i
+                    )
+                    for i, name in enumerate(subtask_names)
+                    if name.strip()
+                ])
 
-                TaskAction.objects.create(
+                transaction.on_commit(partial(
+                    TaskAction.objects.create,
                     task=self.object,
                     user=self.request.user,
                     action_type=TaskAction.ActionType.CREATED,
                     details={'manual_creation': True}
-                )
+                ))
+
+            # Инициализируем денормализованные счетчики подзадач
+            self.object.update_status()
 
             messages.success(self.request, f'Задача "{self.object.title}" успешно создана')
 
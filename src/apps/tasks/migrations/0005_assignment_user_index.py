@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_subtask_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subtaskassignment',
+            index=models.Index(fields=['user', 'subtask'], name='assignment_user_subtask_idx'),
+        ),
+    ]
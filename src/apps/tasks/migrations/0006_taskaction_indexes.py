@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_assignment_user_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskaction',
+            index=models.Index(fields=['-timestamp'], name='taskaction_ts_desc'),
+        ),
+        migrations.AddIndex(
+            model_name='taskaction',
+            index=models.Index(fields=['task', '-timestamp'], name='taskaction_task_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskaction',
+            index=models.Index(fields=['user', '-timestamp'], name='taskaction_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskaction',
+            index=models.Index(fields=['action_type', '-timestamp'], name='taskaction_type_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_taskaction_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='total_subtasks',
+            field=models.PositiveIntegerField(default=0, verbose_name='Всего подзадач'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='completed_subtasks',
+            field=models.PositiveIntegerField(default=0, verbose_name='Завершено подзадач'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_subtask_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(
+                condition=models.Q(('status', 'completed'), _negated=True),
+                fields=['status'],
+                name='task_active_idx',
+            ),
+        ),
+    ]
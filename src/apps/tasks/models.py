@@ -6,10 +6,16 @@ Description: Обновленные модели с подсчетом врем
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.functional import cached_property
+from datetime import datetime, timedelta
 from apps.temp.models import TaskTemplate
 
 
+# Цвета карточек задач: кортеж уровня модуля,
+# чтобы не пересоздавать список на каждый рендер карточки
+TASK_COLORS = ('beige', 'purple', 'pink', 'blue', 'green')
+
+
 class Task(models.Model):
     """
     Задача на конкретный день
@@ -53,6 +59,19 @@ class Task(models.Model):
         verbose_name='Создатель'
     )
 
+    # Денормализованные счетчики подзадач: прогресс карточки читается
+    # прямо из строки задачи, без агрегаций на каждый рендер.
+    # Поддерживаются в update_status - единой точке изменения статусов
+    total_subtasks = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Всего подзадач'
+    )
+
+    completed_subtasks = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Завершено подзадач'
+    )
+
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата создания'
@@ -69,6 +88,19 @@ class Task(models.Model):
         ordering = ['date', '-created_at']
         indexes = [
             models.Index(fields=['date', 'status']),
+            # Фильтрация по статусу без даты (дашборд, управление)
+            models.Index(fields=['status', 'date'], name='task_status_date_idx'),
+            # Задачи конкретного создателя по датам
+            models.Index(fields=['created_by', 'date'], name='task_creator_date_idx'),
+            # Покрывает сортировку по умолчанию без узла Sort
+            models.Index(fields=['date', '-created_at'], name='task_order_idx'),
+            # Частичный индекс только по активным задачам:
+            # счетчики дашборда исключают завершенные
+            models.Index(
+                fields=['status'],
+                condition=~models.Q(status='completed'),
+                name='task_active_idx'
+            ),
         ]
 
     def __str__(self):
@@ -78,34 +110,55 @@ class Task(models.Model):
         """
         Автоматическое обновление статуса задачи
         на основе статусов подзадач
+
+        Статус вычисляется одним агрегирующим запросом
+        вместо загрузки всех подзадач в память.
         """
-        subtasks = self.subtasks.all()
+        agg = self.subtasks.aggregate(
+            total=models.Count('id'),
+            completed=models.Count(
+                'id',
+                filter=models.Q(status=Subtask.Status.COMPLETED)
+            ),
+            active=models.Count(
+                'id',
+                filter=models.Q(status__in=[
+                    Subtask.Status.IN_PROGRESS,
+                    Subtask.Status.COMPLETED
+                ])
+            )
+        )
 
-        if not subtasks.exists():
+        if agg['total'] == 0:
             self.status = self.Status.AVAILABLE
-        elif all(st.status == Subtask.Status.COMPLETED for st in subtasks):
+        elif agg['completed'] == agg['total']:
             self.status = self.Status.COMPLETED
-        elif any(st.status in [Subtask.Status.IN_PROGRESS, Subtask.Status.COMPLETED] for st in subtasks):
+        elif agg['active'] > 0:
             self.status = self.Status.IN_PROGRESS
         else:
             self.status = self.Status.AVAILABLE
 
-        self.save(update_fields=['status', 'updated_at'])
+        # Агрегат уже посчитан - заодно обновляем счетчики
+        self.total_subtasks = agg['total']
+        self.completed_subtasks = agg['completed']
+
+        self.save(update_fields=[
+            'status', 'total_subtasks', 'completed_subtasks', 'updated_at'
+        ])
+
+    def get_progress_percent(self):
+        """Процент завершения по денормализованным счетчикам"""
+        if self.total_subtasks == 0:
+            return 0
+        return int((self.completed_subtasks / self.total_subtasks) * 100)
 
     def get_color_gradient(self):
         """
         Получение цветового градиента для карточки
         Циклическое распределение цветов
         """
-        colors = [
-            'beige',
-            'purple',
-            'pink',
-            'blue',
-            'green'
-        ]
         # Используем ID для циклического выбора цвета
-        return colors[self.id % len(colors)]
+        return TASK_COLORS[self.id % len(TASK_COLORS)]
 
 
 class Subtask(models.Model):
@@ -119,6 +172,14 @@ class Subtask(models.Model):
         IN_PROGRESS = 'in_progress', 'В процессе'
         COMPLETED = 'completed', 'Завершена'
 
+    # CSS-классы индикаторов статуса: словарь создается один раз на класс,
+    # а не на каждый вызов get_status_indicator_class
+    STATUS_INDICATOR_CLASSES = {
+        Status.PENDING: 'indicator-gray',
+        Status.IN_PROGRESS: 'indicator-orange',
+        Status.COMPLETED: 'indicator-green',
+    }
+
     task = models.ForeignKey(
         Task,
         on_delete=models.CASCADE,
@@ -164,38 +225,55 @@ class Subtask(models.Model):
         verbose_name = 'Подзадача'
         verbose_name_plural = 'Подзадачи'
         ordering = ['order']
+        indexes = [
+            # Агрегации статусов внутри задачи (update_status, прогресс)
+            models.Index(fields=['task', 'status'], name='subtask_task_status_idx'),
+            # Вывод подзадач задачи в порядке сортировки
+            models.Index(fields=['task', 'order'], name='subtask_task_order_idx'),
+        ]
 
     def __str__(self):
         return f"{self.task.title} - {self.name}"
 
     def get_assignees(self):
-        """Получение списка исполнителей подзадачи"""
+        """
+        Получение списка исполнителей подзадачи
+
+        Списочные представления должны загружать подзадачи с
+        prefetch_related('assignments__user') - тогда метод читает
+        префетч-кеш и не делает запросов. Без префетча - один запрос
+        с JOIN-ом пользователей.
+        """
+        if 'assignments' in getattr(self, '_prefetched_objects_cache', {}):
+            return [assignment.user for assignment in self.assignments.all()]
+
         return [assignment.user for assignment in self.assignments.select_related('user')]
 
     def get_status_indicator_class(self):
         """Получение CSS класса для индикатора статуса"""
-        status_map = {
-            self.Status.PENDING: 'indicator-gray',
-            self.Status.IN_PROGRESS: 'indicator-orange',
-            self.Status.COMPLETED: 'indicator-green'
-        }
-        return status_map.get(self.status, 'indicator-gray')
+        return self.STATUS_INDICATOR_CLASSES.get(self.status, 'indicator-gray')
+
+    @cached_property
+    def _duration(self):
+        """Длительность выполнения (считается один раз на экземпляр)"""
+        if self.started_at and self.completed_at:
+            return self.completed_at - self.started_at
+        return None
 
     def get_duration_minutes(self):
         """Получение длительности выполнения в минутах"""
-        if self.started_at and self.completed_at:
-            duration = self.completed_at - self.started_at
-            return int(duration.total_seconds() / 60)
+        if self._duration is not None:
+            return int(self._duration.total_seconds() / 60)
         return 0
 
     def get_duration_formatted(self):
         """Форматированное время выполнения"""
-        if not self.started_at or not self.completed_at:
+        duration = self._duration
+        if duration is None:
             return "Не завершена"
 
-        duration = self.completed_at - self.started_at
-        hours = int(duration.total_seconds() // 3600)
-        minutes = int((duration.total_seconds() % 3600) // 60)
+        hours, rem = divmod(int(duration.total_seconds()), 3600)
+        minutes = rem // 60
 
         if hours > 0:
             return f"{hours}ч {minutes}м"
@@ -203,10 +281,18 @@ class Subtask(models.Model):
 
     def mark_in_progress(self):
         """Перевести подзадачу в статус "В процессе" """
-        if self.status == self.Status.PENDING:
+        now = timezone.now()
+
+        # Условный UPDATE вместо чтения статуса + save: переход
+        # выполняется атомарно, без гонки между проверкой и записью
+        updated = Subtask.objects.filter(
+            pk=self.pk,
+            status=self.Status.PENDING
+        ).update(status=self.Status.IN_PROGRESS, started_at=now)
+
+        if updated:
             self.status = self.Status.IN_PROGRESS
-            self.started_at = timezone.now()
-            self.save(update_fields=['status', 'started_at'])
+            self.started_at = now
             self.task.update_status()
 
     def mark_completed(self, user):
@@ -214,10 +300,21 @@ class Subtask(models.Model):
         Пометить подзадачу как завершенную
         Только если пользователь является исполнителем
         """
-        if self.assignments.filter(user=user).exists():
+        now = timezone.now()
+
+        # Проверка назначения и смена статуса одним SQL-запросом
+        updated = Subtask.objects.filter(
+            pk=self.pk,
+            assignments__user=user
+        ).exclude(status=self.Status.COMPLETED).update(
+            status=self.Status.COMPLETED,
+            completed_at=now
+        )
+
+        if updated:
             self.status = self.Status.COMPLETED
-            self.completed_at = timezone.now()
-            self.save(update_fields=['status', 'completed_at'])
+            self.completed_at = now
+            self.__dict__.pop('_duration', None)
             self.task.update_status()
 
             # Создаем запись о завершении с подсчетом времени
@@ -238,6 +335,72 @@ class Subtask(models.Model):
             return True
         return False
 
+    @classmethod
+    def bulk_mark_completed(cls, subtasks, user):
+        """
+        Пакетное завершение подзадач одним набором запросов
+
+        Вместо N вызовов mark_completed (N INSERT-ов в аудит и N
+        save/update_status) выполняет: один запрос на проверку
+        назначений, один UPDATE статусов, один bulk_create записей
+        аудита и update_status по каждой затронутой задаче.
+
+        Returns:
+            list: Завершенные подзадачи
+        """
+        subtasks = list(subtasks)
+        ids = [subtask.pk for subtask in subtasks]
+
+        # Одна проверка назначений на весь набор
+        assigned_ids = set(
+            SubtaskAssignment.objects.filter(
+                user=user,
+                subtask_id__in=ids
+            ).values_list('subtask_id', flat=True)
+        )
+
+        now = timezone.now()
+        allowed = [
+            subtask for subtask in subtasks
+            if subtask.pk in assigned_ids
+            and subtask.status != cls.Status.COMPLETED
+        ]
+        if not allowed:
+            return []
+
+        cls.objects.filter(pk__in=[s.pk for s in allowed]).update(
+            status=cls.Status.COMPLETED,
+            completed_at=now
+        )
+
+        actions = []
+        for subtask in allowed:
+            # Синхронизируем экземпляры с выполненным UPDATE
+            subtask.status = cls.Status.COMPLETED
+            subtask.completed_at = now
+            subtask.__dict__.pop('_duration', None)
+
+            actions.append(TaskAction(
+                task_id=subtask.task_id,
+                user=user,
+                action_type=TaskAction.ActionType.COMPLETED,
+                details={
+                    'subtask': subtask.name,
+                    'started_at': subtask.started_at.isoformat() if subtask.started_at else None,
+                    'completed_at': now.isoformat(),
+                    'duration_minutes': subtask.get_duration_minutes(),
+                    'duration_formatted': subtask.get_duration_formatted()
+                }
+            ))
+
+        TaskAction.bulk_log(actions)
+
+        # Статус каждой родительской задачи пересчитываем один раз
+        for task in {subtask.task for subtask in allowed}:
+            task.update_status()
+
+        return allowed
+
 
 class SubtaskAssignment(models.Model):
     """
@@ -268,6 +431,10 @@ class SubtaskAssignment(models.Model):
         verbose_name = 'Назначение подзадачи'
         verbose_name_plural = 'Назначения подзадач'
         unique_together = ['subtask', 'user']
+        indexes = [
+            # Обратное направление: все подзадачи конкретного исполнителя
+            models.Index(fields=['user', 'subtask'], name='assignment_user_subtask_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.first_name_only} -> {self.subtask.name}"
@@ -322,9 +489,30 @@ class TaskAction(models.Model):
         verbose_name = 'Действие с задачей'
         verbose_name_plural = 'Действия с задачами'
         ordering = ['-timestamp']
+        indexes = [
+            # Лента последних действий без сортировки всей таблицы
+            models.Index(fields=['-timestamp'], name='taskaction_ts_desc'),
+            # История конкретной задачи / пользователя / типа действия
+            models.Index(fields=['task', '-timestamp'], name='taskaction_task_ts_idx'),
+            models.Index(fields=['user', '-timestamp'], name='taskaction_user_ts_idx'),
+            models.Index(fields=['action_type', '-timestamp'], name='taskaction_type_ts_idx'),
+        ]
+
+    @classmethod
+    def bulk_log(cls, actions):
+        """
+        Записать набор действий одним INSERT
+
+        Единая точка для пакетного аудита: сколько бы действий ни
+        накопила операция, в БД уходит один запрос.
+        """
+        return cls.objects.bulk_create(actions, batch_size=500)
 
     def __str__(self):
         # Форматированный вывод с временем выполнения
+        task = self.task
+        user = self.user
+
         if self.action_type == self.ActionType.COMPLETED and 'duration_minutes' in self.details:
             subtask_name = self.details.get('subtask', 'Подзадача')
             duration = self.details.get('duration_formatted', 'N/A')
@@ -333,19 +521,21 @@ class TaskAction(models.Model):
 
             # Форматируем время начала и завершения
             if started and completed:
-                from datetime import datetime
                 start_time = datetime.fromisoformat(started).strftime('%H:%M')
                 end_time = datetime.fromisoformat(completed).strftime('%H:%M')
                 time_range = f"{start_time}-{end_time}"
             else:
                 time_range = ""
 
-            return f"{self.task.title} - {subtask_name}, выполнил {self.user.first_name_only}, за {duration}, {time_range}"
+            return f"{task.title} - {subtask_name}, выполнил {user.first_name_only}, за {duration}, {time_range}"
 
-        return f"{self.user.first_name_only} - {self.get_action_type_display()} - {self.task.title}"
+        return f"{user.first_name_only} - {self.get_action_type_display()} - {task.title}"
 
     def get_formatted_description(self):
         """Получение отформатированного описания действия для админки"""
+        task = self.task
+        user = self.user
+
         if self.action_type == self.ActionType.COMPLETED and 'duration_minutes' in self.details:
             subtask_name = self.details.get('subtask', 'Подзадача')
             duration = self.details.get('duration_formatted', 'N/A')
@@ -355,7 +545,6 @@ class TaskAction(models.Model):
             completed = self.details.get('completed_at', '')
 
             if started and completed:
-                from datetime import datetime
                 start_dt = datetime.fromisoformat(started)
                 end_dt = datetime.fromisoformat(completed)
                 start_time = start_dt.strftime('%H:%M')
@@ -363,19 +552,20 @@ class TaskAction(models.Model):
                 date_str = start_dt.strftime('%d.%m.%Y')
 
                 return {
-                    'task': self.task.title,
+                    'task': task.title,
                     'subtask': subtask_name,
-                    'user': self.user.first_name_only,
+                    'user': user.first_name_only,
                     'duration': duration,
                     'duration_minutes': duration_minutes,
                     'time_range': f"{start_time}-{end_time}",
                     'date': date_str,
-                    'full_text': f"Задача: {self.task.title} - {subtask_name}, выполнил {self.user.first_name_only}, за {duration} ({start_time}-{end_time}), {date_str}"
+                    'full_text': f"Задача: {task.title} - {subtask_name}, выполнил {user.first_name_only}, за {duration} ({start_time}-{end_time}), {date_str}"
                 }
 
+        action = self.get_action_type_display()
         return {
-            'task': self.task.title,
-            'user': self.user.first_name_only,
-            'action': self.get_action_type_display(),
-            'full_text': f"{self.user.first_name_only} - {self.get_action_type_display()} - {self.task.title}"
+            'task': task.title,
+            'user': user.first_name_only,
+            'action': action,
+            'full_text': f"{user.first_name_only} - {action} - {task.title}"
         }
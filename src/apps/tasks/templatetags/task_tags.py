@@ -5,12 +5,22 @@ Description: Кастомные template tags для работы с задач
 """
 from django import template
 
+from apps.tasks.utils.helpers import calculate_task_progress
+
 register = template.Library()
 
 
 @register.filter
 def count_completed(subtasks):
-    """Подсчет завершенных подзадач"""
+    """
+    Подсчет завершенных подзадач
+
+    Если подзадачи уже загружены (prefetch_related в представлении),
+    считаем по кешу без нового COUNT-запроса.
+    """
+    if getattr(subtasks, '_result_cache', None) is not None:
+        return sum(1 for subtask in subtasks._result_cache if subtask.status == 'completed')
+
     return subtasks.filter(status='completed').count()
 
 
@@ -23,28 +33,4 @@ def is_assigned_to(subtask, user):
 @register.simple_tag
 def task_progress(task):
     """Получение прогресса выполнения задачи"""
-    subtasks = task.subtasks.all()
-    total = subtasks.count()
-
-    if total == 0:
-        return {
-            'percentage': 0,
-            'completed': 0,
-            'in_progress': 0,
-            'pending': 0,
-            'total': 0
-        }
-
-    completed = subtasks.filter(status='completed').count()
-    in_progress = subtasks.filter(status='in_progress').count()
-    pending = subtasks.filter(status='pending').count()
-
-    percentage = int((completed / total) * 100)
-
-    return {
-        'percentage': percentage,
-        'completed': completed,
-        'in_progress': in_progress,
-        'pending': pending,
-        'total': total
-    }
+    return calculate_task_progress(task)
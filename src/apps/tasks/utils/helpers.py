@@ -3,8 +3,35 @@ Filename: helpers.py
 Path: src/apps/tasks/utils/helpers.py
 Description: Вспомогательные функции для работы с задачами
 """
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+from functools import lru_cache
+from django.db.models import Count, Q
 from django.utils import timezone
+from apps.tasks.models import TASK_COLORS
+
+DAY_NAMES = ('Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс')
+
+
+@lru_cache(maxsize=64)
+def _week(selected_date, today):
+    """Построение недели для пары (выбранная дата, сегодня) с кешем"""
+    # Находим понедельник текущей недели
+    selected_weekday = selected_date.weekday()
+    start_of_week = selected_date - timedelta(days=selected_weekday)
+
+    return tuple(
+        {
+            'date': day,
+            'day_name': DAY_NAMES[i],
+            'day_number': day.day,
+            # Сравнение индекса дня дешевле сравнения дат
+            'is_active': i == selected_weekday,
+            'is_today': day == today
+        }
+        for i, day in enumerate(
+            start_of_week + timedelta(days=i) for i in range(7)
+        )
+    )
 
 
 def get_week_dates(selected_date=None):
@@ -17,26 +44,13 @@ def get_week_dates(selected_date=None):
     Returns:
         list: Список словарей с информацией о днях недели
     """
+    today = timezone.now().date()
     if selected_date is None:
-        selected_date = timezone.now().date()
-
-    # Находим понедельник текущей недели
-    start_of_week = selected_date - timedelta(days=selected_date.weekday())
-
-    week_dates = []
-    day_names = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
-
-    for i in range(7):
-        date = start_of_week + timedelta(days=i)
-        week_dates.append({
-            'date': date,
-            'day_name': day_names[i],
-            'day_number': date.day,
-            'is_active': date == selected_date,
-            'is_today': date == timezone.now().date()
-        })
+        selected_date = today
 
-    return week_dates
+    # Результат кешируется по паре дат - повторные рендеры той же
+    # недели в течение дня не пересобирают список
+    return list(_week(selected_date, today))
 
 
 def get_date_from_string(date_string):
@@ -50,7 +64,9 @@ def get_date_from_string(date_string):
         date or None: Объект даты или None при ошибке
     """
     try:
-        return datetime.strptime(date_string, '%Y-%m-%d').date()
+        # fromisoformat - специализированный C-парсер, заметно быстрее
+        # strptime и без промежуточного datetime
+        return date.fromisoformat(date_string)
     except (ValueError, TypeError):
         return None
 
@@ -65,41 +81,44 @@ def calculate_task_progress(task):
     Returns:
         dict: Информация о прогрессе
     """
-    subtasks = task.subtasks.all()
-    total_subtasks = subtasks.count()
-
-    if total_subtasks == 0:
-        return {
-            'percentage': 0,
-            'completed': 0,
-            'in_progress': 0,
-            'pending': 0,
-            'total': 0
+    # Если подзадачи уже префетчены, считаем по кешу без запросов
+    if 'subtasks' in getattr(task, '_prefetched_objects_cache', {}):
+        statuses = [subtask.status for subtask in task.subtasks.all()]
+        agg = {
+            'total': len(statuses),
+            'completed': statuses.count('completed'),
+            'in_progress': statuses.count('in_progress'),
+            'pending': statuses.count('pending'),
         }
-
-    completed = subtasks.filter(status='completed').count()
-    in_progress = subtasks.filter(status='in_progress').count()
-    pending = subtasks.filter(status='pending').count()
-
-    percentage = int((completed / total_subtasks) * 100)
+    else:
+        # Один агрегирующий запрос вместо четырех COUNT
+        agg = task.subtasks.aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            in_progress=Count('id', filter=Q(status='in_progress')),
+            pending=Count('id', filter=Q(status='pending'))
+        )
+
+    total = agg['total']
+    percentage = int((agg['completed'] / total) * 100) if total else 0
 
     return {
         'percentage': percentage,
-        'completed': completed,
-        'in_progress': in_progress,
-        'pending': pending,
-        'total': total_subtasks
+        'completed': agg['completed'],
+        'in_progress': agg['in_progress'],
+        'pending': agg['pending'],
+        'total': total
     }
 
 
 def get_available_colors():
     """
-    Получение списка доступных цветов для карточек задач
+    Получение доступных цветов для карточек задач
 
     Returns:
-        list: Список названий цветов
+        tuple: Названия цветов
     """
-    return ['beige', 'purple', 'pink', 'blue', 'green']
+    return TASK_COLORS
 
 
 def assign_color_to_task(task):
@@ -133,8 +152,8 @@ def format_time_spent(started_at, completed_at=None):
     end_time = completed_at or timezone.now()
     duration = end_time - started_at
 
-    hours = int(duration.total_seconds() // 3600)
-    minutes = int((duration.total_seconds() % 3600) // 60)
+    hours, rem = divmod(int(duration.total_seconds()), 3600)
+    minutes = rem // 60
 
     if hours > 0:
         return f"{hours}ч {minutes}м"
@@ -151,14 +170,13 @@ def get_task_statistics(tasks_queryset):
     Returns:
         dict: Статистика
     """
-    total_tasks = tasks_queryset.count()
-
-    return {
-        'total': total_tasks,
-        'available': tasks_queryset.filter(status='available').count(),
-        'in_progress': tasks_queryset.filter(status='in_progress').count(),
-        'completed': tasks_queryset.filter(status='completed').count(),
-    }
+    # Один агрегирующий запрос вместо четырех COUNT
+    return tasks_queryset.aggregate(
+        total=Count('id'),
+        available=Count('id', filter=Q(status='available')),
+        in_progress=Count('id', filter=Q(status='in_progress')),
+        completed=Count('id', filter=Q(status='completed')),
+    )
 
 
 def can_user_complete_task(user, task):
@@ -176,15 +194,16 @@ def can_user_complete_task(user, task):
     if user.can_create_tasks:
         return True
 
-    # Сотрудники могут завершать, если назначены на все подзадачи
-    subtasks = task.subtasks.all()
-
-    if not subtasks.exists():
-        return False
-
-    # Проверяем, назначен ли пользователь на все подзадачи
-    for subtask in subtasks:
-        if not subtask.assignments.filter(user=user).exists():
-            return False
-
-    return True
+    # Сотрудники могут завершать, если назначены на все подзадачи.
+    # Один запрос: сколько подзадач всего и сколько из них назначено
+    # пользователю, вместо проверки exists() на каждую подзадачу
+    agg = task.subtasks.aggregate(
+        total=Count('id', distinct=True),
+        assigned=Count(
+            'id',
+            distinct=True,
+            filter=Q(assignments__user=user)
+        )
+    )
+
+    return agg['total'] > 0 and agg['assigned'] == agg['total']
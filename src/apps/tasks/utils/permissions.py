@@ -12,7 +12,7 @@ class RoleRequiredMixin(UserPassesTestMixin):
     Базовый миксин для проверки роли пользователя
     Используется для ограничения доступа к представлениям
     """
-    required_roles = []
+    required_roles = frozenset()
 
     def test_func(self):
         """Проверка наличия требуемой роли у пользователя"""
@@ -28,17 +28,42 @@ class RoleRequiredMixin(UserPassesTestMixin):
 
 class AdminOnlyMixin(RoleRequiredMixin):
     """Доступ только для администраторов"""
-    required_roles = ['admin']
+    required_roles = frozenset({'admin'})
 
 
 class ManagerOrAdminMixin(RoleRequiredMixin):
     """Доступ для менеджеров и администраторов"""
-    required_roles = ['admin', 'manager']
+    required_roles = frozenset({'admin', 'manager'})
 
 
 class EmployeeOnlyMixin(RoleRequiredMixin):
     """Доступ только для сотрудников"""
-    required_roles = ['employee']
+    required_roles = frozenset({'employee'})
+
+
+# Таблицы доступа (роль, действие) -> разрешено.
+# Один поиск по словарю вместо цепочки проверок is_admin/is_manager
+# и повторных сравнений строки action
+_TASK_ACL = {
+    ('admin', 'view'): True,
+    ('admin', 'edit'): True,
+    ('admin', 'delete'): True,
+    ('manager', 'view'): True,
+    ('manager', 'edit'): True,
+    ('manager', 'delete'): True,
+    ('employee', 'view'): True,
+}
+
+# Для подзадач admin/manager могут все; сотрудник - только завершение
+# своих подзадач (проверяется отдельным запросом)
+_SUBTASK_ACL = {
+    ('admin', 'complete'): True,
+    ('admin', 'edit'): True,
+    ('admin', 'delete'): True,
+    ('manager', 'complete'): True,
+    ('manager', 'edit'): True,
+    ('manager', 'delete'): True,
+}
 
 
 def check_task_permission(user, task, action='view'):
@@ -53,19 +78,7 @@ def check_task_permission(user, task, action='view'):
     Returns:
         bool: Есть ли права
     """
-    # Администраторы имеют полный доступ
-    if user.is_admin:
-        return True
-
-    # Менеджеры могут редактировать и удалять
-    if user.is_manager and action in ['view', 'edit', 'delete']:
-        return True
-
-    # Сотрудники могут только просматривать
-    if user.is_employee and action == 'view':
-        return True
-
-    return False
+    return _TASK_ACL.get((user.role, action), False)
 
 
 def check_subtask_permission(user, subtask, action='complete'):
@@ -80,12 +93,11 @@ def check_subtask_permission(user, subtask, action='complete'):
     Returns:
         bool: Есть ли права
     """
-    # Администраторы и менеджеры имеют полный доступ
-    if user.can_create_tasks:
+    if _SUBTASK_ACL.get((user.role, action), False):
         return True
 
     # Сотрудники могут завершать только свои подзадачи
-    if action == 'complete':
+    if user.is_employee and action == 'complete':
         return subtask.assignments.filter(user=user).exists()
 
     return False
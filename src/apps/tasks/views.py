@@ -6,7 +6,10 @@ Description: Обновленные представления с режимом
 - Добавлен режим отображения всех задач с группировкой по датам
 - Поддержка множественных исполнителей на одну подзадачу
 """
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+from functools import partial
+from itertools import groupby
+from operator import attrgetter
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
 from django.views import View
@@ -15,11 +18,47 @@ from django.urls import reverse_lazy
 from django.http import JsonResponse, HttpResponse
 from django.db import transaction
 from django.contrib import messages
-from django.db.models import Q, Count
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.db.models import Prefetch, Q, Count
 from .models import Task, Subtask, SubtaskAssignment, TaskAction
 from .forms import TaskCreateForm, TaskUpdateForm, TakeTaskForm, CompleteSubtaskForm
 from apps.temp.models import TaskTemplate, SubtaskTemplateItem
 
+# Короткие названия дней недели для навигации дашборда
+DAY_NAMES_SHORT = ('Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс')
+
+
+def task_with_subtasks_queryset():
+    """
+    Базовый QuerySet задач с подзадачами и исполнителями
+
+    Явный Prefetch вместо 'subtasks__assignments__user': подзадачи
+    приходят упорядоченными из БД, а по исполнителям загружаются
+    только колонки, которые реально рендерятся в карточке.
+    """
+    return Task.objects.select_related(
+        'created_by',
+        'template'
+    ).defer(
+        # Описание шаблона нигде в карточках/деталях не рендерится,
+        # а TextField может быть большим - не тянем его из БД
+        'template__description'
+    ).prefetch_related(
+        Prefetch(
+            'subtasks',
+            queryset=Subtask.objects.order_by('order').prefetch_related(
+                Prefetch(
+                    'assignments',
+                    queryset=SubtaskAssignment.objects.select_related('user').only(
+                        'id', 'subtask_id',
+                        'user__id', 'user__username', 'user__full_name'
+                    )
+                )
+            )
+        )
+    )
+
 
 class ManagerRequiredMixin(UserPassesTestMixin):
     """Миксин для проверки прав менеджера или администратора"""
@@ -36,7 +75,7 @@ class HTMXMixin:
         return self.request.headers.get('HX-Request') == 'true'
 
 
-class DashboardView(LoginRequiredMixin, HTMXMixin, ListView):
+class DashboardView(LoginRequiredMixin, ListView):
     """
     Главная страница - дашборд с задачами
     Поддерживает два режима:
@@ -48,98 +87,103 @@ class DashboardView(LoginRequiredMixin, HTMXMixin, ListView):
     template_name = 'tasks/dashboard.html'
     context_object_name = 'tasks'
 
-    def get_view_mode(self):
-        """Получение режима отображения: 'daily' или 'all'"""
+    def dispatch(self, request, *args, **kwargs):
+        """Кешируем значения, нужные нескольким методам, один раз на запрос"""
+        self._today = timezone.localdate()
+        self._can_create = request.user.is_authenticated and request.user.can_create_tasks
+        return super().dispatch(request, *args, **kwargs)
+
+    @cached_property
+    def view_mode(self):
+        """Режим отображения ('daily' или 'all'), читается один раз"""
         return self.request.GET.get('mode', 'daily')
 
     def get_queryset(self):
         """Получение задач в зависимости от режима"""
-        mode = self.get_view_mode()
+        mode = self.view_mode
 
-        base_queryset = Task.objects.select_related(
-            'created_by',
-            'template'
-        ).prefetch_related(
-            'subtasks__assignments__user'
-        )
+        base_queryset = task_with_subtasks_queryset()
 
         if mode == 'all':
             # Режим "Все задачи" - от 3 дней назад до +∞
-            today = datetime.now().date()
-            start_date = today - timedelta(days=3)
-
-            return base_queryset.filter(
-                date__gte=start_date
-            ).order_by('date', '-created_at')
+            start_date = self._today - timedelta(days=3)
+
+            # Диапазон открыт сверху и может быть большим: читаем
+            # серверным курсором кусками по 500 строк, чтобы драйвер
+            # не буферизовал весь результат целиком. prefetch при
+            # iterator(chunk_size=...) выполняется почанково
+            return list(
+                base_queryset.filter(
+                    date__gte=start_date
+                ).order_by('date', '-created_at').iterator(chunk_size=500)
+            )
         else:
             # Режим "По дням" - только выбранная дата
-            selected_date = self.get_selected_date()
+            selected_date = self.selected_date
             return base_queryset.filter(
                 date=selected_date
             ).order_by('-created_at')
 
-    def get_selected_date(self):
-        """Получение выбранной даты из GET параметра или текущая дата"""
+    @cached_property
+    def selected_date(self):
+        """Выбранная дата из GET параметра; парсится один раз на запрос"""
         date_str = self.request.GET.get('date')
 
         if date_str:
             try:
-                return datetime.strptime(date_str, '%Y-%m-%d').date()
+                # fromisoformat - C-парсер ровно под формат 'YYYY-MM-DD',
+                # заметно быстрее strptime с format-строкой
+                return date.fromisoformat(date_str)
             except ValueError:
                 pass
 
-        return datetime.now().date()
+        return self._today
 
     def get_week_dates(self):
         """
         Генерация дат для навигации: 3 дня до выбранной даты, выбранная дата, 3 дня после
         """
-        selected_date = self.get_selected_date()
-        today = datetime.now().date()
-
-        week_dates = []
-        day_names_short = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+        selected_date = self.selected_date
+        today = self._today
 
         # Генерируем 7 дней: 3 до, текущий, 3 после
-        for i in range(-3, 4):
-            date = selected_date + timedelta(days=i)
-            day_name = day_names_short[date.weekday()]
-
-            week_dates.append({
+        return [
+            {
                 'date': date,
-                'day_name': day_name,
+                'day_name': DAY_NAMES_SHORT[date.weekday()],
                 'day_number': date.day,
                 'is_active': date == selected_date,
                 'is_today': date == today
-            })
-
-        return week_dates
+            }
+            for date in (
+                selected_date + timedelta(days=i) for i in range(-3, 4)
+            )
+        ]
 
     def get_grouped_tasks(self):
         """
         Группировка задач по датам для режима "Все задачи"
         Возвращает список групп с датами и задачами
         """
-        today = datetime.now().date()
+        today = self._today
         start_date = today - timedelta(days=3)
 
-        # Получаем все задачи от start_date
-        all_tasks = self.get_queryset()
-
-        # Группируем задачи по датам
-        tasks_by_date = {}
-        for task in all_tasks:
-            if task.date not in tasks_by_date:
-                tasks_by_date[task.date] = []
-            tasks_by_date[task.date].append(task)
+        # Используем уже загруженный ListView список, не выполняя
+        # запрос из get_queryset второй раз
+        all_tasks = self.object_list
 
-        # Получаем все уникальные даты задач
-        task_dates = sorted(tasks_by_date.keys())
+        # Задачи уже отсортированы по дате в SQL - группируем одним
+        # проходом groupby без промежуточного словаря и sorted()
+        tasks_by_date = {
+            date: list(tasks)
+            for date, tasks in groupby(all_tasks, key=attrgetter('date'))
+        }
 
-        if not task_dates:
+        if not tasks_by_date:
             return []
 
-        # Находим минимальную и максимальную даты
+        # Ключи сохраняют порядок сортировки запроса
+        task_dates = list(tasks_by_date)
         min_date = max(start_date, task_dates[0])
         max_date = task_dates[-1]
 
@@ -162,25 +206,22 @@ class DashboardView(LoginRequiredMixin, HTMXMixin, ListView):
     def get_context_data(self, **kwargs):
         """Добавление дополнительного контекста"""
         context = super().get_context_data(**kwargs)
-        mode = self.get_view_mode()
+        mode = self.view_mode
 
         context['view_mode'] = mode
         context['week_dates'] = self.get_week_dates()
-        context['selected_date'] = self.get_selected_date()
-        context['can_create_tasks'] = self.request.user.can_create_tasks
+        context['selected_date'] = self.selected_date
+        context['can_create_tasks'] = self._can_create
 
         if mode == 'all':
             # Для режима "Все задачи" передаем группированные задачи
             context['grouped_tasks'] = self.get_grouped_tasks()
-            # Подсчет активных задач для всего периода
-            context['active_tasks_count'] = Task.objects.filter(
-                date__gte=datetime.now().date() - timedelta(days=3)
-            ).exclude(status='completed').count()
-        else:
-            # Для режима "По дням" подсчет только для выбранной даты
-            context['active_tasks_count'] = Task.objects.filter(
-                date=self.get_selected_date()
-            ).exclude(status='completed').count()
+
+        # Задачи уже загружены ListView - считаем активные в памяти,
+        # без второго запроса с тем же фильтром
+        context['active_tasks_count'] = sum(
+            1 for task in self.object_list if task.status != 'completed'
+        )
 
         return context
 
@@ -228,20 +269,31 @@ class TaskCreateView(LoginRequiredMixin, ManagerRequiredMixin, HTMXMixin, Create
 
             # Создаем подзадачи на основе выбранных объектов
             if subtask_ids:
-                for order, subtask_id in enumerate(subtask_ids):
-                    try:
-                        subtask_item = SubtaskTemplateItem.objects.get(id=subtask_id)
-                        Subtask.objects.create(
-                            task=self.object,
-                            name=subtask_item.name,
-                            order=order
-                        )
-                    except SubtaskTemplateItem.DoesNotExist:
-                        continue
-
-            # Логируем создание задачи
+                # Один SELECT по всем выбранным элементам и один INSERT
+                # вместо пары запросов на каждую подзадачу
+                items = SubtaskTemplateItem.objects.filter(
+                    id__in=subtask_ids
+                ).only('id', 'name').in_bulk()
+
+                Subtask.objects.bulk_create([
+                    Subtask(
+                        task=self.object,
+                        name=items[int(subtask_id)].name,
+                        order=order
+                    )
+                    for order, subtask_id in enumerate(subtask_ids)
+                    if int(subtask_id) in items
+                ], batch_size=500)
+
+                # Инициализируем денормализованные счетчики подзадач
+                self.object.update_status()
+
+            # Логируем создание задачи после фиксации транзакции:
+            # аудит не удлиняет доменную транзакцию и не пишется
+            # при откате
             template = form.cleaned_data.get('template')
-            TaskAction.objects.create(
+            transaction.on_commit(partial(
+                TaskAction.objects.create,
                 task=self.object,
                 user=self.request.user,
                 action_type=TaskAction.ActionType.CREATED,
@@ -249,7 +301,7 @@ class TaskCreateView(LoginRequiredMixin, ManagerRequiredMixin, HTMXMixin, Create
                     'template_name': template.name if template else None,
                     'subtasks_count': len(subtask_ids)
                 }
-            )
+            ))
 
             messages.success(self.request, f'Задача "{self.object.title}" успешно создана')
 
@@ -279,17 +331,22 @@ class TaskUpdateView(LoginRequiredMixin, ManagerRequiredMixin, HTMXMixin, Update
 
     def form_valid(self, form):
         """Логирование изменений"""
-        changes = {}
-
-        for field in form.changed_data:
-            old_value = getattr(self.object, field)
-            new_value = form.cleaned_data[field]
-            changes[field] = {
-                'old': str(old_value),
-                'new': str(new_value)
+        # Старые значения берем из form.initial: к моменту form_valid
+        # cleaned-данные уже записаны в self.object, и getattr вернул бы
+        # новое значение
+        changes = {
+            field: {
+                'old': str(form.initial.get(field)),
+                'new': str(form.cleaned_data[field])
             }
+            for field in form.changed_data
+        }
 
-        response = super().form_valid(form)
+        self.object = form.save(commit=False)
+        if form.changed_data:
+            # UPDATE только по измененным колонкам вместо полной строки
+            self.object.save(update_fields=[*form.changed_data, 'updated_at'])
+        response = redirect(self.success_url)
 
         if changes:
             TaskAction.objects.create(
@@ -352,12 +409,7 @@ class TaskDetailView(LoginRequiredMixin, HTMXMixin, DetailView):
 
     def get_queryset(self):
         """Оптимизированный запрос с подгрузкой связанных данных"""
-        return Task.objects.select_related(
-            'created_by',
-            'template'
-        ).prefetch_related(
-            'subtasks__assignments__user'
-        )
+        return task_with_subtasks_queryset()
 
 
 class TakeTaskView(LoginRequiredMixin, HTMXMixin, View):
@@ -384,34 +436,69 @@ class TakeTaskView(LoginRequiredMixin, HTMXMixin, View):
 
         if form.is_valid():
             with transaction.atomic():
-                selected_subtasks = form.cleaned_data['subtasks']
-
-                for subtask in selected_subtasks:
-                    # Создаем назначение, если еще не существует
-                    # Теперь поддерживается множественное назначение
-                    assignment, created = SubtaskAssignment.objects.get_or_create(
-                        subtask=subtask,
+                # Материализуем выбор один раз: дальше только len()
+                # и итерации по списку, без повторных SELECT
+                selected_subtasks = list(form.cleaned_data['subtasks'])
+                selected_ids = [subtask.pk for subtask in selected_subtasks]
+
+                # Существующие назначения - одним запросом,
+                # вместо get_or_create на каждую подзадачу
+                existing = set(
+                    SubtaskAssignment.objects.filter(
+                        subtask_id__in=selected_ids,
                         user=request.user
+                    ).values_list('subtask_id', flat=True)
+                )
+                new_ids = [pk for pk in selected_ids if pk not in existing]
+
+                if new_ids:
+                    # Один INSERT на все новые назначения; конфликт
+                    # с параллельным взятием той же подзадачи не страшен
+                    SubtaskAssignment.objects.bulk_create(
+                        [
+                            SubtaskAssignment(subtask_id=pk, user=request.user)
+                            for pk in new_ids
+                        ],
+                        ignore_conflicts=True
                     )
 
-                    # Переводим подзадачу в статус "В процессе"
-                    if created and subtask.status == Subtask.Status.PENDING:
-                        subtask.mark_in_progress()
+                    # Один UPDATE переводит новые подзадачи "В процессе"
+                    started = Subtask.objects.filter(
+                        pk__in=new_ids,
+                        status=Subtask.Status.PENDING
+                    ).update(
+                        status=Subtask.Status.IN_PROGRESS,
+                        started_at=timezone.now()
+                    )
 
-                # Логируем взятие задачи
-                TaskAction.objects.create(
+                    if started:
+                        task.update_status()
+
+                # Логируем взятие задачи после фиксации транзакции
+                transaction.on_commit(partial(
+                    TaskAction.objects.create,
                     task=task,
                     user=request.user,
                     action_type=TaskAction.ActionType.ASSIGNED,
                     details={
                         'subtasks': [st.name for st in selected_subtasks]
                     }
-                )
+                ))
 
                 messages.success(
                     request,
-                    f'Вы взяли {selected_subtasks.count()} подзадач из задачи "{task.title}"'
+                    f'Вы взяли {len(selected_subtasks)} подзадач из задачи "{task.title}"'
                 )
+
+            # Для HTMX отдаем обновленную карточку задачи, как при
+            # завершении подзадачи, вместо редиректа на весь дашборд
+            if self.is_htmx():
+                task = task_with_subtasks_queryset().get(pk=task.pk)
+
+                return render(request, 'tasks/partials/task_card.html', {
+                    'task': task,
+                    'user': request.user
+                })
         else:
             messages.error(request, 'Выберите хотя бы одну подзадачу')
 
@@ -454,12 +541,7 @@ class CompleteSubtaskView(LoginRequiredMixin, HTMXMixin, View):
         # Для HTMX возвращаем только обновленную карточку задачи
         if self.is_htmx():
             # Перезагружаем задачу с обновленными данными
-            task = Task.objects.select_related(
-                'created_by',
-                'template'
-            ).prefetch_related(
-                'subtasks__assignments__user'
-            ).get(pk=task.pk)
+            task = task_with_subtasks_queryset().get(pk=task.pk)
 
             return render(request, 'tasks/partials/task_card.html', {
                 'task': task,
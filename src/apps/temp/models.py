@@ -106,8 +106,14 @@ class TaskTemplate(models.Model):
         return self.name
 
     def get_subtask_templates(self):
-        """Получение всех подзадач шаблона в правильном порядке"""
-        return self.subtask_templates.all().order_by('order')
+        """
+        Получение всех подзадач шаблона в правильном порядке
+
+        Порядок задает Meta.ordering связи; без явного order_by()
+        вызов отдает префетч-кеш, если он загружен, вместо нового
+        запроса.
+        """
+        return self.subtask_templates.all()
 
 
 class SubtaskTemplate(models.Model):
@@ -4,6 +4,8 @@ Path: src/apps/temp/views.py
 Description: API представления для работы с шаблонами задач и объектами подзадач
 """
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_page
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.http import JsonResponse
@@ -68,37 +70,47 @@ class TaskTemplateDetailAPIView(LoginRequiredMixin, View):
     def get(self, request, pk):
         """Возвращает JSON с подзадачами шаблона"""
         try:
-            template = TaskTemplate.objects.prefetch_related(
-                'subtask_templates__subtask_item'
+            # Для ответа нужны только четыре колонки шаблона
+            template = TaskTemplate.objects.only(
+                'id', 'name', 'description', 'available_for_managers'
             ).get(pk=pk)
-
-            # Проверка доступа
-            if not request.user.can_manage_templates and not template.available_for_managers:
-                return JsonResponse({'error': 'Доступ запрещен'}, status=403)
-
-            subtasks = [
-                {
-                    'id': st.subtask_item.id,
-                    'name': st.subtask_item.name,
-                    'order': st.order
-                }
-                for st in template.get_subtask_templates()
-            ]
-
-            return JsonResponse({
-                'id': template.id,
-                'name': template.name,
-                'description': template.description,
-                'subtasks': subtasks
-            })
-
         except TaskTemplate.DoesNotExist:
             return JsonResponse({'error': 'Шаблон не найден'}, status=404)
 
+        # Проверка доступа
+        if not request.user.can_manage_templates and not template.available_for_managers:
+            return JsonResponse({'error': 'Доступ запрещен'}, status=403)
+
+        # values_list отдает кортежи без создания модельных объектов:
+        # для крупных шаблонов это дешевле prefetch + инстанцирования
+        subtasks = [
+            {'id': item_id, 'name': name, 'order': order}
+            for item_id, name, order in SubtaskTemplate.objects.filter(
+                task_template=template
+            ).order_by('order').values_list(
+                'subtask_item_id', 'subtask_item__name', 'order'
+            )
+        ]
+
+        return JsonResponse({
+            'id': template.id,
+            'name': template.name,
+            'description': template.description,
+            'subtasks': subtasks
+        })
+
 
 class SubtaskItemListAPIView(LoginRequiredMixin, View):
-    """API endpoint для получения списка всех объектов подзадач"""
+    """
+    API endpoint для получения списка всех объектов подзадач
+
+    Список одинаков для всех пользователей и меняется редко (правки
+    только из админки), поэтому ответ кешируется на минуту. Декоратор
+    стоит на get, а не на as_view - проверка авторизации выполняется
+    для каждого запроса и редирект на логин в кеш не попадает.
+    """
 
+    @method_decorator(cache_page(60))
     def get(self, request):
         """Возвращает JSON со списком всех активных объектов подзадач"""
         subtask_items = SubtaskTemplateItem.objects.filter(is_active=True).order_by('name')
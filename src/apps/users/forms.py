@@ -7,22 +7,29 @@ from django import forms
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from .models import User
 
+# Атрибуты виджетов собираются один раз при импорте модуля;
+# классы форм ссылаются на готовые словари вместо литералов в каждом поле
+USERNAME_ATTRS = {'class': 'form-input', 'placeholder': 'Имя пользователя'}
+PASSWORD_ATTRS = {'class': 'form-input', 'placeholder': 'Пароль'}
+FULL_NAME_ATTRS = {'class': 'form-input', 'placeholder': 'Полное имя'}
+EMAIL_ATTRS = {'class': 'form-input', 'placeholder': 'Email'}
+
 
 class UserLoginForm(AuthenticationForm):
-    """Форма входа пользователя"""
+    """
+    Форма входа пользователя
+
+    Поля собираются метаклассом один раз при создании класса;
+    на каждый запрос форма лишь deepcopy-ирует base_fields, так что
+    ручное предвычисление declared_fields ничего не экономит.
+    """
 
     username = forms.CharField(
-        widget=forms.TextInput(attrs={
-            'class': 'form-input',
-            'placeholder': 'Имя пользователя'
-        })
+        widget=forms.TextInput(attrs=USERNAME_ATTRS)
     )
 
     password = forms.CharField(
-        widget=forms.PasswordInput(attrs={
-            'class': 'form-input',
-            'placeholder': 'Пароль'
-        })
+        widget=forms.PasswordInput(attrs=PASSWORD_ATTRS)
     )
 
 
@@ -33,16 +40,7 @@ class UserRegistrationForm(UserCreationForm):
         model = User
         fields = ['username', 'full_name', 'email', 'password1', 'password2']
         widgets = {
-            'username': forms.TextInput(attrs={
-                'class': 'form-input',
-                'placeholder': 'Имя пользователя'
-            }),
-            'full_name': forms.TextInput(attrs={
-                'class': 'form-input',
-                'placeholder': 'Полное имя'
-            }),
-            'email': forms.EmailInput(attrs={
-                'class': 'form-input',
-                'placeholder': 'Email'
-            }),
+            'username': forms.TextInput(attrs=USERNAME_ATTRS),
+            'full_name': forms.TextInput(attrs=FULL_NAME_ATTRS),
+            'email': forms.EmailInput(attrs=EMAIL_ATTRS),
         }
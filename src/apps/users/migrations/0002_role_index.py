@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.CharField(
+                choices=[
+                    ('admin', 'Администратор'),
+                    ('manager', 'Менеджер'),
+                    ('employee', 'Сотрудник'),
+                ],
+                db_index=True,
+                default='employee',
+                max_length=20,
+                verbose_name='Роль',
+            ),
+        ),
+    ]
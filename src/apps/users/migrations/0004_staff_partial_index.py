@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_name_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(
+                condition=models.Q(('role__in', ['admin', 'manager'])),
+                fields=['full_name'],
+                name='users_staff_idx',
+            ),
+        ),
+    ]
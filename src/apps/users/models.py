@@ -3,8 +3,33 @@ Filename: models.py
 Path: src/apps/users/models.py
 Description: Модели пользователей с ролевой системой
 """
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.utils.functional import cached_property
+
+
+class UserWithRelatedManager(UserManager):
+    """Менеджер пользователей с подгрузкой связанных прав"""
+
+    def with_related(self):
+        """
+        Пользователи вместе с группами и правами
+
+        Для списков, где у каждого пользователя читаются groups или
+        user_permissions: два префетч-запроса на весь список вместо
+        запроса на каждого пользователя.
+        """
+        return self.get_queryset().prefetch_related('groups', 'user_permissions')
+
+    def identity_only(self):
+        """
+        Узкие строки пользователей: только идентификация и роль
+
+        Для списков и проверок прав, которым не нужны last_login,
+        date_joined, email и прочие колонки, - меньше байт на строку
+        из БД и по сети.
+        """
+        return self.get_queryset().only('id', 'username', 'full_name', 'role')
 
 
 class User(AbstractUser):
@@ -22,8 +47,14 @@ class User(AbstractUser):
         MANAGER = 'manager', 'Менеджер'
         EMPLOYEE = 'employee', 'Сотрудник'
 
+    # Допустимые значения роли для проверок за O(1): полезно при
+    # массовых импортах, где валидация выполняется на каждую строку
+    VALID_ROLES = frozenset(Role.values)
+
     full_name = models.CharField(
-        max_length=255,
+        # 150 символов - как у username в Django; колонка участвует
+        # в составных индексах, короче лимит - компактнее B-tree
+        max_length=150,
         verbose_name='Полное имя'
     )
 
@@ -31,43 +62,66 @@ class User(AbstractUser):
         max_length=20,
         choices=Role.choices,
         default=Role.EMPLOYEE,
+        db_index=True,
         verbose_name='Роль'
     )
 
+    objects = UserWithRelatedManager()
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ['full_name']
+        indexes = [
+            # Сортировка по умолчанию без узла Sort
+            models.Index(fields=['full_name'], name='users_fullname_idx'),
+            # Списки, отфильтрованные по роли и упорядоченные по имени
+            models.Index(fields=['role', 'full_name'], name='users_role_fullname_idx'),
+            # Частичный индекс по админам/менеджерам: выпадающие списки
+            # назначения не касаются строк сотрудников
+            models.Index(
+                fields=['full_name'],
+                condition=models.Q(role__in=['admin', 'manager']),
+                name='users_staff_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.full_name or self.username
 
-    @property
+    @cached_property
     def is_admin(self):
         """Проверка, является ли пользователь администратором"""
         return self.role == self.Role.ADMIN
 
-    @property
+    @cached_property
     def is_manager(self):
         """Проверка, является ли пользователь менеджером"""
         return self.role == self.Role.MANAGER
 
-    @property
+    @cached_property
     def is_employee(self):
         """Проверка, является ли пользователь сотрудником"""
         return self.role == self.Role.EMPLOYEE
 
-    @property
+    @cached_property
     def can_create_tasks(self):
         """Проверка прав на создание задач"""
-        return self.role in [self.Role.ADMIN, self.Role.MANAGER]
+        return self.role in MANAGEMENT_ROLES
 
-    @property
+    @cached_property
     def can_manage_templates(self):
         """Проверка прав на управление шаблонами"""
-        return self.role == self.Role.ADMIN
+        # Совпадает с is_admin - переиспользуем уже посчитанное значение
+        return self.is_admin
 
-    @property
+    @cached_property
     def first_name_only(self):
         """Получение только имени (без фамилии)"""
-        return self.full_name.split()[0] if self.full_name else self.username
+        # partition не разбивает остаток строки в список, как split
+        return self.full_name.partition(' ')[0] if self.full_name else self.username
+
+
+# Роли с правами управления: frozenset уровня модуля, чтобы горячая
+# проверка can_create_tasks не пересобирала список на каждый вызов
+MANAGEMENT_ROLES = frozenset({User.Role.ADMIN, User.Role.MANAGER})
@@ -9,6 +9,11 @@ from django.views.generic import CreateView
 from .forms import UserLoginForm, UserRegistrationForm
 from .models import User
 
+# Общие ленивые URL уровня модуля: один объект на процесс,
+# резолвится при первом обращении и переиспользуется всеми view
+LOGIN_URL = reverse_lazy('users:login')
+DASHBOARD_URL = reverse_lazy('tasks:dashboard')
+
 
 class UserLoginView(LoginView):
     """Представление для входа пользователя"""
@@ -16,15 +21,14 @@ class UserLoginView(LoginView):
     template_name = 'users/login.html'
     form_class = UserLoginForm
     redirect_authenticated_user = True
-
-    def get_success_url(self):
-        return reverse_lazy('tasks:dashboard')
+    # Класс-атрибут вместо get_success_url: ?next= продолжает работать
+    next_page = DASHBOARD_URL
 
 
 class UserLogoutView(LogoutView):
     """Представление для выхода пользователя"""
 
-    next_page = reverse_lazy('users:login')
+    next_page = LOGIN_URL
 
 
 class UserRegisterView(CreateView):
@@ -33,4 +37,4 @@ class UserRegisterView(CreateView):
     model = User
     form_class = UserRegistrationForm
     template_name = 'users/register.html'
-    success_url = reverse_lazy('users:login')
+    success_url = LOGIN_URL
@@ -0,0 +1,28 @@
+"""
+Filename: middleware.py
+Path: src/config/middleware.py
+Description: Служебные middleware проекта
+"""
+from django.http import HttpResponse
+
+# Тело ответа health check кодируется один раз на процесс
+_HEALTH_BYTES = b"OK"
+
+
+class HealthCheckMiddleware:
+    """
+    Ранний ответ на health check до остального стека
+
+    Стоит первым в MIDDLEWARE: пробы живости не трогают сессии,
+    аутентификацию и URL-resolver - самый частый запрос обрабатывается
+    минимальным количеством Python-кода.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == '/health/':
+            return HttpResponse(_HEALTH_BYTES, content_type="text/plain")
+
+        return self.get_response(request)